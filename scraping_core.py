@@ -0,0 +1,621 @@
+"""
+Shared scraping layer for the Part 2 job-source agents (part2_agent.py, part2_agent_prev.py).
+- One aiohttp session with per-host rate limiting, exponential backoff and an optional disk cache
+- lxml-based HTML parsing / link scanning
+- One headless Chromium with pooled contexts for LinkedIn pages that need rendering
+- LinkedIn company extraction, company-site lookup, career page finder, job-on-career extractor
+The agents only keep their orchestration (what to process, in which order, where rows go).
+"""
+import asyncio
+import functools
+import json
+import logging
+import random
+import re
+import string
+import time
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from lxml import etree
+from lxml import html as lh
+
+# Playwright
+try:
+    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+    PLAYWRIGHT_AVAILABLE = True
+except Exception:
+    PLAYWRIGHT_AVAILABLE = False
+
+# Optional persistent HTTP cache
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except Exception:
+    DISKCACHE_AVAILABLE = False
+
+# ---------- Config ----------
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}
+REQUEST_TIMEOUT = 12
+MAX_RETRIES = 3
+CONNECTOR_LIMIT = 64  # open sockets overall
+CONNECTOR_LIMIT_PER_HOST = 8
+HOST_MIN_INTERVAL = 0.2  # seconds between request starts to one host
+LINKEDIN_MIN_INTERVAL = 1.0  # LinkedIn answers bursts with 999/429, so space its requests further
+BACKOFF_BASE = 1.0  # seconds; doubled on every retry
+MAX_BACKOFF = 30.0  # seconds; cap for computed and server-requested (Retry-After) delays
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HEAD_REFUSED_STATUSES = {403, 405, 501}  # servers that reject HEAD but may answer GET
+MEMO_MAXSIZE = 4096  # per memoized helper
+HTTP_CACHE_DIR = ".http_cache"
+HTTP_CACHE_TTL = 24 * 3600  # seconds
+# we only need the HTML; skip the heavy sub-resources LinkedIn pages pull in
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+# search pages rely on layout for infinite scroll, so keep their stylesheets
+SEARCH_BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+SELECTOR_WAIT_MS = 3000  # upper bound for selector waits; they return as soon as the DOM is ready
+JOB_LINK_SELECTOR = "a[href*='/jobs/view/']"
+# absolute, query-stripped hrefs of every job link, collected in the browser
+JOB_LINKS_JS = "sel => Array.from(document.querySelectorAll(sel), a => a.href.split('?')[0])"
+STREAM_CHUNK_SIZE = 16384  # bytes fed to the incremental parser at a time
+DUCKDUCKGO_API_URL = "https://api.duckduckgo.com/"
+
+CAREER_PATHS = ("/careers", "/careers/", "/jobs", "/jobs/", "/about/careers", "/company/careers", "/join-us")
+CAREER_KEYWORDS = ["career", "careers", "jobs", "join", "vacancies", "openings", "join-us", "work-with-us"]
+JOB_KEYWORDS = ["job", "position", "apply", "opening", "/jobs/", "/open-positions/"]
+ATS_HOSTS = ["lever.co", "greenhouse.io", "workday.com", "myworkday.com", "myworkdayjobs.com", "smartrecruiters.com", "apply.workable.com", "jobvite.com"]
+LINKEDIN_HOSTS = ["linkedin.com", "lnkd.in"]
+
+# keyword lists compiled once into single alternations (one C-level scan instead of one `in` per keyword)
+def keywords_re(keywords):
+    return re.compile("|".join(map(re.escape, keywords)), re.I)
+
+CAREER_RE = keywords_re(CAREER_KEYWORDS)
+JOB_RE = keywords_re(JOB_KEYWORDS)
+CAREER_OR_JOB_RE = keywords_re(CAREER_KEYWORDS + JOB_KEYWORDS)
+# "." + host ends with one of these iff host is that domain or a subdomain of it
+_LINKEDIN_SUFFIXES = tuple("." + h for h in LINKEDIN_HOSTS)
+_ATS_SUFFIXES = tuple("." + h for h in ATS_HOSTS)
+# bytes that may not appear in a guessed domain; dropped with one C-level bytes.translate
+_NON_DOMAIN_BYTES = bytes(b for b in range(256) if chr(b) not in string.ascii_lowercase + string.digits + "-.")
+ATS_URL_RE = re.compile(r"https?://[^\s'\"<>]*(?:" + "|".join(map(re.escape, ATS_HOSTS)) + r")[^\s'\"<>]*")
+
+# ---------- Helpers ----------
+def parse_html(markup):
+    """Parse markup straight into an lxml.html tree (no BeautifulSoup wrapper objects); None if empty."""
+    if not markup:
+        return None
+    try:
+        return lh.document_fromstring(markup)
+    except ValueError:
+        # str input carrying an <?xml encoding=...?> declaration: lxml wants bytes for that
+        return lh.document_fromstring(markup.encode("utf-8"))
+    except etree.ParserError:
+        return None
+
+def iter_anchors(tree):
+    """Yield (element, href) for every <a href> using lxml's C-level link iterator."""
+    for el, attr, link, _ in tree.iterlinks():
+        if attr == "href" and el.tag == "a":
+            yield el, link
+
+def company_name_from_page(tree):
+    """Company name from the og:site_name meta tag, else from a "Job Title at Company | LinkedIn" title."""
+    name = tree.xpath("string(//meta[@property='og:site_name' or @name='og:site_name']/@content)").strip()
+    if name:
+        return name
+    title = tree.findtext(".//title") or ""
+    if " at " in title:
+        return title.split(" at ")[-1].split("|")[0].strip()
+    return None
+
+def create_session():
+    """One shared aiohttp session (and connection pool) for the whole run."""
+    connector = aiohttp.TCPConnector(limit=CONNECTOR_LIMIT, limit_per_host=CONNECTOR_LIMIT_PER_HOST)
+    return aiohttp.ClientSession(connector=connector, headers=HEADERS)
+
+# per-host politeness state, keyed by netloc
+_host_semaphores = {}
+_host_next_allowed = {}  # netloc -> time.monotonic() of the next free send slot
+
+def _host_semaphore(host):
+    sem = _host_semaphores.get(host)
+    if sem is None:
+        sem = _host_semaphores[host] = asyncio.Semaphore(CONNECTOR_LIMIT_PER_HOST)
+    return sem
+
+def _retry_after(headers):
+    """Seconds the server asked us to wait via Retry-After / X-RateLimit-*, or None."""
+    value = headers.get("Retry-After")
+    if value:
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except Exception:
+            pass
+    if headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            reset = float(headers.get("X-RateLimit-Reset", ""))
+        except ValueError:
+            return None
+        # some APIs send an epoch timestamp, others a delta in seconds
+        return max(0.0, reset - time.time()) if reset > 1e9 else reset
+    return None
+
+def _min_interval(host):
+    hostname = host.rsplit(":", 1)[0]
+    return LINKEDIN_MIN_INTERVAL if ("." + hostname).endswith(_LINKEDIN_SUFFIXES) else HOST_MIN_INTERVAL
+
+async def _wait_for_host(host):
+    """
+    Claim the next send slot for host: requests to one host start at least _min_interval(host)
+    apart, and none starts inside a backoff window a previous 429/5xx opened.
+    """
+    now = time.monotonic()
+    slot = max(_host_next_allowed.get(host, 0), now)
+    # reserve before sleeping (no await in between), so concurrent callers queue up behind us
+    _host_next_allowed[host] = slot + _min_interval(host)
+    if slot > now:
+        await asyncio.sleep(slot - now)
+
+def _backoff_delay(attempt, retry_after=None):
+    """Server-requested delay as given (capped), else capped exponential backoff with jitter."""
+    if retry_after:
+        return min(retry_after, MAX_BACKOFF)
+    return min(BACKOFF_BASE * 2 ** attempt, MAX_BACKOFF) + random.random()
+
+def _push_back_host(host, attempt, headers):
+    """Open a host-wide backoff window after a 429/5xx so concurrent requests to host wait too."""
+    delay = _backoff_delay(attempt, _retry_after(headers))
+    _host_next_allowed[host] = max(_host_next_allowed.get(host, 0), time.monotonic() + delay)
+    return delay
+
+_http_cache = None
+
+def _get_http_cache():
+    global _http_cache
+    if _http_cache is None and DISKCACHE_AVAILABLE:
+        _http_cache = diskcache.Cache(HTTP_CACHE_DIR)
+    return _http_cache
+
+def shared_inflight(func):
+    """
+    Memoize an async helper on its (hashable) arguments after the session. Concurrent callers with
+    the same arguments await one shared task, so a company's site is resolved/probed once per run.
+    """
+    tasks = {}
+
+    @functools.wraps(func)
+    async def wrapper(session, *args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        task = tasks.get(key)
+        if task is None:
+            if len(tasks) >= MEMO_MAXSIZE:
+                tasks.pop(next(iter(tasks)))  # drop the oldest entry
+            task = tasks[key] = asyncio.ensure_future(func(session, *args, **kwargs))
+        # shield: one cancelled caller must not cancel the lookup for everybody else
+        return await asyncio.shield(task)
+
+    wrapper.cache_clear = tasks.clear
+    return wrapper
+
+async def _request(session, method, url, allow_redirects=True, timeout=REQUEST_TIMEOUT, read_body=True,
+                   retry=True, **kwargs):
+    """
+    Rate-limited request with exponential backoff on 429/5xx and network errors.
+    Returns (status, final_url, text) or None when every attempt failed; text is None if read_body is False.
+    With retry=False a single attempt is made and any status (5xx included) is returned as is,
+    without opening a host-wide backoff window.
+    Successful (< 400) responses are persisted for HTTP_CACHE_TTL when diskcache is installed; error
+    pages (403/404, LinkedIn's 999) are not, so one transient block does not stick across runs.
+    """
+    cache = _get_http_cache()
+    cache_key = (method, url, allow_redirects, read_body, repr(sorted(kwargs.items())))
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+    host = urlparse(url).netloc.lower()
+    sem = _host_semaphore(host)
+    for attempt in range(MAX_RETRIES if retry else 1):
+        try:
+            async with sem:
+                await _wait_for_host(host)
+                async with session.request(method, url, allow_redirects=allow_redirects,
+                                           timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as r:
+                    if r.status not in RETRY_STATUSES or not retry:
+                        text = await r.text(errors="replace") if read_body else None
+                        result = (r.status, str(r.url), text)
+                        if cache is not None and r.status < 400:
+                            cache.set(cache_key, result, expire=HTTP_CACHE_TTL)
+                        return result
+                    logging.debug(f"{method} {url}: HTTP {r.status} (attempt {attempt+1})")
+                    # server is pushing back: hold off the whole host, not just this URL,
+                    # unless we are giving up anyway
+                    if attempt + 1 < MAX_RETRIES:
+                        delay = _push_back_host(host, attempt, r.headers)
+                        logging.debug(f"backing off {host} for {delay:.1f}s")
+        except Exception as e:
+            logging.debug(f"{method} {url}: attempt {attempt+1} failed: {e}")
+            if attempt + 1 < MAX_RETRIES:
+                await asyncio.sleep(_backoff_delay(attempt))
+    return None
+
+async def safe_get(session, url, allow_redirects=True, timeout=REQUEST_TIMEOUT):
+    """GET url and return the decoded body, or None on an error status / after MAX_RETRIES failures."""
+    result = await _request(session, "GET", url, allow_redirects=allow_redirects, timeout=timeout)
+    if not result:
+        return None
+    status, _, text = result
+    return text if status < 400 else None
+
+@shared_inflight
+async def resolve_final_url(session, url):
+    """
+    Resolve redirects/short links (e.g. lnkd.in) to final destination using HEAD, falling back
+    to GET when the server refuses HEAD or HEAD fails outright. The GET body is never downloaded.
+    Any response carries the final URL (even a 5xx one), so neither request is retried.
+    """
+    if not url:
+        return None
+    result = await _request(session, "HEAD", url, read_body=False, retry=False)
+    if result and result[0] not in HEAD_REFUSED_STATUSES:
+        return result[1]
+    # HEAD not allowed or not answered: GET, but release the connection without reading the body
+    result = await _request(session, "GET", url, read_body=False, retry=False)
+    if result:
+        return result[1]
+    return url
+
+async def head_ok(session, url):
+    """
+    Cheap preflight: False when a HEAD shows the page is missing, so its body is never downloaded.
+    A single attempt that never opens a backoff window; refused or 5xx HEADs fall through to the GET.
+    """
+    result = await _request(session, "HEAD", url, read_body=False, retry=False)
+    return bool(result) and (result[0] == 200 or result[0] in HEAD_REFUSED_STATUSES or result[0] >= 500)
+
+async def first_matching_page(session, candidates, pattern):
+    """
+    HEAD-preflight all candidate URLs concurrently, GET only the survivors, and return the
+    first candidate (in the given order) whose body matches pattern.
+    """
+    alive = await asyncio.gather(*(head_ok(session, c) for c in candidates))
+    candidates = [c for c, ok in zip(candidates, alive) if ok]
+    bodies = await asyncio.gather(*(safe_get(session, c) for c in candidates))
+    for candidate, text in zip(candidates, bodies):
+        if text and pattern.search(text):
+            return candidate
+    return None
+
+def is_linkedin_domain(url):
+    if not url:
+        return False
+    return ("." + (urlparse(url).hostname or "")).endswith(_LINKEDIN_SUFFIXES)
+
+def normalize_url(base, href):
+    if not href:
+        return None
+    href = href.strip()
+    # most hrefs on search/career pages are already absolute: skip urljoin's parse of both URLs
+    if href.startswith(("http://", "https://")):
+        return href
+    if href.startswith("#") or href.lower().startswith(("javascript:", "mailto:")):
+        return None
+    if href.startswith("//"):
+        parsed_base = urlparse(base)
+        scheme = parsed_base.scheme or "https"
+        return scheme + ":" + href
+    return urljoin(base, href)
+
+def is_ats_url(url):
+    if not url:
+        return False
+    return ("." + (urlparse(url).hostname or "")).endswith(_ATS_SUFFIXES)
+
+def guess_domain(company_name):
+    """'Acme Corp.' -> 'acmecorp.': keeps only lower-case ASCII letters, digits, '-' and '.'."""
+    return company_name.lower().encode("ascii", "ignore").translate(None, _NON_DOMAIN_BYTES).decode("ascii")
+
+def first_external_link(tree, avoid_domain=None):
+    for _, href in iter_anchors(tree):
+        href = href.strip()
+        if href.startswith("http") and (not avoid_domain or avoid_domain not in href):
+            return href
+    return None
+
+# ---------- Playwright ----------
+async def start_clients(stack, use_playwright=True):
+    """
+    Enter the shared aiohttp session and, when wanted and installed, one headless Chromium on
+    the AsyncExitStack. Returns (session, browser); browser is None without Playwright.
+    """
+    session = await stack.enter_async_context(create_session())
+    if use_playwright and not PLAYWRIGHT_AVAILABLE:
+        logging.warning("Playwright requested but not available; scraping may fail. Proceeding with plain HTTP fallback.")
+    browser = None
+    if use_playwright and PLAYWRIGHT_AVAILABLE:
+        pw_stack = AsyncExitStack()
+        try:
+            pw = await pw_stack.enter_async_context(async_playwright())
+            browser = await launch_browser(pw)
+            pw_stack.push_async_callback(browser.close)
+        except Exception as e:
+            # e.g. `playwright install` never run: keep going on the plain HTTP fallbacks
+            logging.warning(f"Could not launch Chromium ({e}); proceeding with plain HTTP fallback.")
+            await pw_stack.aclose()
+            return session, None
+        stack.push_async_callback(pw_stack.aclose)
+    return session, browser
+
+async def launch_browser(pw):
+    return await pw.chromium.launch(headless=True, args=["--no-sandbox"])
+
+async def new_browser_context(browser, blocked_resource_types=BLOCKED_RESOURCE_TYPES):
+    """Fresh context on the shared browser that aborts requests for blocked resource types."""
+    context = await browser.new_context(user_agent=HEADERS["User-Agent"])
+
+    async def route_handler(route):
+        if route.request.resource_type in blocked_resource_types:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", route_handler)
+    return context
+
+# ---------- LinkedIn job extraction ----------
+async def render_linkedin_job_with_playwright(context, job_url, timeout_ms=10000):
+    """Render LinkedIn job posting in a (pooled) browser context and return (company_name, candidate_company_website_or_None)."""
+    if context is None:
+        return None, None
+    try:
+        page = await context.new_page()
+        try:
+            # the pooled contexts would otherwise hit LinkedIn all at once
+            await _wait_for_host(urlparse(job_url).netloc.lower())
+            await page.goto(job_url, timeout=timeout_ms)
+            try:
+                await page.wait_for_selector("meta[property='og:site_name']", state="attached", timeout=SELECTOR_WAIT_MS)
+            except PlaywrightTimeoutError:
+                pass  # parse whatever rendered; the title / requests fallbacks still apply
+            content = await page.content()
+        finally:
+            await page.close()
+        tree = parse_html(content)
+        if tree is None:
+            return None, None
+        company_name = company_name_from_page(tree)
+        # company website heuristics: anchor text 'Company website' or first external link (not linkedin)
+        candidate_site = None
+        for a, href in iter_anchors(tree):
+            txt = a.text_content().lower()
+            if "company website" in txt or txt.strip() == "website":
+                candidate_site = href
+                break
+        if not candidate_site:
+            candidate_site = first_external_link(tree, avoid_domain="linkedin.com")
+        return company_name, candidate_site
+    except PlaywrightTimeoutError:
+        logging.warning("Playwright timeout rendering LinkedIn job.")
+    except Exception as e:
+        logging.debug(f"playwright render error: {e}")
+    return None, None
+
+async def extract_linkedin_job_requests(session, job_url):
+    """Plain HTTP fallback to extract company name and first external link."""
+    text = await safe_get(session, job_url)
+    if not text:
+        return None, None
+    tree = parse_html(text)
+    if tree is None:
+        return None, None
+    return company_name_from_page(tree), first_external_link(tree, avoid_domain="linkedin.com")
+
+# ---------- Search web for company site (DuckDuckGo) ----------
+@shared_inflight
+async def search_company_site_duckduckgo(session, company_name):
+    if not company_name:
+        return None
+    # Instant Answer API: a few KB of JSON instead of ~100KB of result-page HTML to parse
+    params = {"q": company_name, "format": "json", "no_html": 1, "skip_disambig": 1}
+    result = await _request(session, "GET", DUCKDUCKGO_API_URL, params=params)
+    if not result or result[0] >= 400:
+        logging.debug(f"DuckDuckGo search failed for {company_name!r}")
+        return None
+    try:
+        data = json.loads(result[2])
+    except ValueError as e:
+        logging.debug(f"DuckDuckGo returned invalid JSON: {e}")
+        return None
+    # "Results" holds the entity's official site; AbstractURL is usually Wikipedia, so it is not used
+    for item in data.get("Results") or []:
+        if item.get("FirstURL"):
+            return item["FirstURL"]
+    return None
+
+# ---------- Career page finder / job-on-career extractor ----------
+@shared_inflight
+async def find_career_page(session, company_site_url, paths=CAREER_PATHS, link_re=CAREER_RE,
+                           page_re=CAREER_OR_JOB_RE, link_page_re=CAREER_OR_JOB_RE):
+    """
+    Career page of a company site: the first common path whose body matches page_re, else the first
+    homepage link matching link_re whose body matches link_page_re (None: any link that loads),
+    else a footer career link, else an ATS URL embedded in a script. Defaults are this module's rules;
+    callers with their own path/keyword lists pass them in (as tuples / compiled patterns).
+    """
+    if not company_site_url:
+        return None
+    # resolve final
+    company_site_url = await resolve_final_url(session, company_site_url)
+    parsed = urlparse(company_site_url)
+    if not parsed.scheme:
+        company_site_url = "https://" + company_site_url
+        parsed = urlparse(company_site_url)
+    base = f"{parsed.scheme}://{parsed.netloc}"
+    # try common paths
+    candidate = await first_matching_page(session, [urljoin(base, p) for p in paths], page_re)
+    if candidate:
+        logging.info(f"Career page found by path: {candidate}")
+        return candidate
+    # scan homepage
+    text = await safe_get(session, base)
+    if not text:
+        return None
+    tree = parse_html(text)
+    if tree is None:
+        return None
+    anchors = []
+    for a, href in iter_anchors(tree):
+        full = normalize_url(base, href)
+        if not full:
+            continue
+        if link_re.search(href) or link_re.search(a.text_content()):
+            anchors.append(full)
+    # header/nav and footer often link the same page: fetch each URL once
+    anchors = list(dict.fromkeys(anchors))
+    bodies = await asyncio.gather(*(safe_get(session, full) for full in anchors))
+    fetched = dict(zip(anchors, bodies))
+    for full, text in fetched.items():
+        if text and (link_page_re is None or link_page_re.search(text)):
+            logging.info(f"Career page discovered: {full}")
+            return full
+    # footer: accept any career-looking link that loaded; reuse bodies fetched above
+    footer = tree.find(".//footer")
+    if footer is not None:
+        links = []
+        for _, href in iter_anchors(footer):
+            full = normalize_url(base, href)
+            if full and link_re.search(full):
+                links.append(full)
+        links = list(dict.fromkeys(links))
+        missing = [full for full in links if full not in fetched]
+        fetched.update(zip(missing, await asyncio.gather(*(safe_get(session, full) for full in missing))))
+        for full in links:
+            if fetched[full]:
+                return full
+    # script scanning for ATS endpoints
+    for s in tree.iter("script"):
+        m = ATS_URL_RE.search(s.text or "")
+        if m:
+            return m.group(0)
+    return None
+
+async def extract_one_job_from_career(session, career_url, job_re=JOB_RE):
+    if not career_url:
+        return None
+    text = await safe_get(session, career_url)
+    if not text:
+        return None
+    tree = parse_html(text)
+    if tree is None:
+        return None
+    for a, href in iter_anchors(tree):
+        if job_re.search(href) or job_re.search(a.text_content()):
+            candidate = normalize_url(career_url, href)
+            if candidate and not candidate.lower().startswith("javascript:") and "mailto:" not in candidate:
+                return candidate
+    if is_ats_url(career_url):
+        return career_url
+    parsed = urlparse(career_url)
+    base = f"{parsed.scheme}://{parsed.netloc}"
+    return await first_matching_page(session, [urljoin(base, p) for p in ["/jobs", "/openings", "/careers/jobs"]], job_re)
+
+# ---------- Scrape LinkedIn jobs search page (collect /jobs/view/ URLs) ----------
+async def scrape_jobs_from_search_page(browser, search_url, max_scrolls=20):
+    job_urls = set()
+    if browser is None:
+        logging.warning("Playwright not available; cannot scrape search page reliably.")
+        return []
+    context = await new_browser_context(browser, SEARCH_BLOCKED_RESOURCE_TYPES)
+    try:
+        page = await context.new_page()
+        await _wait_for_host(urlparse(search_url).netloc.lower())
+        await page.goto(search_url, timeout=30000)
+        try:
+            await page.wait_for_selector(JOB_LINK_SELECTOR, state="attached", timeout=SELECTOR_WAIT_MS)
+        except PlaywrightTimeoutError:
+            pass
+        hrefs = await page.evaluate(JOB_LINKS_JS, JOB_LINK_SELECTOR)
+        job_urls.update(hrefs)
+        for i in range(max_scrolls):
+            prev = len(job_urls)
+            await page.evaluate("window.scrollBy(0, window.innerHeight * 2)")
+            # wait only until the scroll has loaded more postings
+            try:
+                await page.wait_for_function(
+                    "([sel, n]) => document.querySelectorAll(sel).length > n",
+                    arg=[JOB_LINK_SELECTOR, len(hrefs)], timeout=SELECTOR_WAIT_MS)
+            except PlaywrightTimeoutError:
+                pass  # nothing new; the unchanged-count check below ends the loop
+            # query the live DOM instead of re-serialising and re-parsing the whole page
+            hrefs = await page.evaluate(JOB_LINKS_JS, JOB_LINK_SELECTOR)
+            job_urls.update(hrefs)
+            if len(job_urls) == prev:
+                break
+    finally:
+        await context.close()
+    return list(job_urls)
+
+async def scrape_jobs_from_search_page_http(session, search_url):
+    """
+    Playwright-less fallback: stream LinkedIn's server-rendered search page through an incremental
+    lxml parser, collecting /jobs/view/ links as chunks arrive and aborting the download at the footer.
+    """
+    job_urls = set()
+    host = urlparse(search_url).netloc.lower()
+    for attempt in range(MAX_RETRIES):
+        last_attempt = attempt + 1 == MAX_RETRIES
+        parser = etree.HTMLPullParser(events=("start", "end"))
+        try:
+            async with _host_semaphore(host):
+                await _wait_for_host(host)
+                async with session.get(search_url, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)) as r:
+                    if r.status in RETRY_STATUSES and not last_attempt:
+                        # LinkedIn's guest search often answers 429: back off the host and retry, as _request does
+                        delay = _push_back_host(host, attempt, r.headers)
+                        logging.debug(f"Search page returned HTTP {r.status}; backing off {host} for {delay:.1f}s")
+                        continue
+                    if r.status >= 400:
+                        logging.warning(f"Search page returned HTTP {r.status}.")
+                        return []
+                    async for chunk in r.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        parser.feed(chunk)
+                        for event, el in parser.read_events():
+                            if event == "end":
+                                el.clear(keep_tail=True)  # we never look back, so don't keep the tree
+                            elif el.tag == "a":
+                                href = el.get("href") or ""
+                                if "/jobs/view/" in href:
+                                    job_urls.add(normalize_url(search_url, href.split("?")[0]))
+                            elif el.tag == "footer" and job_urls:
+                                # the results list is complete; leaving the block drops the rest of the body
+                                return list(job_urls)
+                    return list(job_urls)
+        except Exception as e:
+            logging.debug(f"search page stream error (attempt {attempt+1}): {e}")
+            if not last_attempt:
+                await asyncio.sleep(_backoff_delay(attempt))
+    return list(job_urls)
+
+# ---------- LinkedIn posting -> (company name, company website) ----------
+async def extract_company_from_job(session, job_url, context=None):
+    """Steps A-B: company name and website from the LinkedIn posting."""
+    logging.info(f"Processing job: {job_url}")
+    # Step A: Try Playwright render extraction (context is None when Playwright is disabled/unavailable)
+    company_name = None
+    company_website = None
+    if context is not None:
+        cname, csite = await render_linkedin_job_with_playwright(context, job_url)
+        company_name = cname or company_name
+        company_website = csite or company_website
+    # Step B: fallback requests extraction
+    if not company_name or not company_website:
+        cname2, csite2 = await extract_linkedin_job_requests(session, job_url)
+        company_name = company_name or cname2
+        company_website = company_website or csite2
+    return company_name, company_website